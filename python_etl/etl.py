@@ -5,16 +5,29 @@ import pymongo
 from pymongo import MongoClient
 import psycopg2
 from psycopg2 import sql
-from datetime import datetime
+from psycopg2.extras import execute_values
+from datetime import datetime, date, time as dt_time
+import json
 import os
+import sqlite3
+from abc import ABC, abstractmethod
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Carrega as variáveis do arquivo .env
 load_dotenv()
 
+# Destino do Data Warehouse: "postgres" (padrão), "duckdb" ou "sqlite"
+DW_TARGET = os.getenv("DW_TARGET", "postgres").lower()
+# Fonte das avaliações: "mongo" (padrão), "mongomock" ou "json"
+REVIEWS_SOURCE = os.getenv("REVIEWS_SOURCE", "mongo").lower()
+
 # Função para aguardar a disponibilidade dos serviços
 def wait_for_services():
+    # Alvos embutidos não dependem de serviços externos
+    if DW_TARGET != "postgres" and REVIEWS_SOURCE != "mongo":
+        return
     print("Aguardando serviços ficarem disponíveis...")
     time.sleep(10)  # Aguarda 10 segundos para garantir que os serviços estejam prontos
 
@@ -34,14 +47,41 @@ MONGO_USER = os.getenv("MONGO_USER", "mongo")
 MONGO_PASSWORD = os.getenv("MONGO_PASSWORD", "mongo")
 
 # Caminhos dos arquivos CSV
-INPUT_DIR = "/app/input"
+INPUT_DIR = os.getenv("INPUT_DIR", "/app/input")
 CUSTOMERS_FILE = os.path.join(INPUT_DIR, "olist_customers_dataset.csv")
 ORDER_ITEMS_FILE = os.path.join(INPUT_DIR, "olist_order_items_dataset.csv")
 ORDER_PAYMENTS_FILE = os.path.join(INPUT_DIR, "olist_order_payments_dataset.csv")
 ORDERS_FILE = os.path.join(INPUT_DIR, "olist_orders_dataset.csv")
 PRODUCTS_FILE = os.path.join(INPUT_DIR, "olist_products_dataset.csv")
 
-# Verificar existência dos arquivos CSV
+# Arquivo JSON (array ou JSON Lines) com as avaliações, usado pelas fontes "json" e "mongomock"
+REVIEWS_JSON_FILE = os.getenv("REVIEWS_JSON_FILE", os.path.join(INPUT_DIR, "order_reviews.json"))
+# Na ausência do arquivo JSON, as avaliações são lidas do script de carga do MongoDB
+MONGO_INIT_FILE = os.getenv("MONGO_INIT_FILE", os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "mongodb-init", "init.js")
+))
+
+# Arquivo do Data Warehouse local (DuckDB/SQLite); ":memory:" mantém tudo em memória
+DW_LOCAL_PATH = os.getenv("DW_LOCAL_PATH", f"{POSTGRES_DB}.{DW_TARGET}")
+
+# Quantidade de linhas enviadas por comando nas cargas em lote
+BULK_PAGE_SIZE = int(os.getenv("BULK_PAGE_SIZE", 5000))
+
+# Número de threads usadas na extração e na validação das fontes
+DQ_WORKERS = int(os.getenv("DQ_WORKERS", min(6, os.cpu_count() or 1)))
+
+# Mapeamento de siglas para nomes completos dos estados brasileiros
+ESTADOS_MAP = {
+    'AC': 'Acre', 'AL': 'Alagoas', 'AP': 'Amapá', 'AM': 'Amazonas',
+    'BA': 'Bahia', 'CE': 'Ceará', 'DF': 'Distrito Federal', 'ES': 'Espírito Santo',
+    'GO': 'Goiás', 'MA': 'Maranhão', 'MT': 'Mato Grosso', 'MS': 'Mato Grosso do Sul',
+    'MG': 'Minas Gerais', 'PA': 'Pará', 'PB': 'Paraíba', 'PR': 'Paraná',
+    'PE': 'Pernambuco', 'PI': 'Piauí', 'RJ': 'Rio de Janeiro', 'RN': 'Rio Grande do Norte',
+    'RS': 'Rio Grande do Sul', 'RO': 'Rondônia', 'RR': 'Roraima', 'SC': 'Santa Catarina',
+    'SP': 'São Paulo', 'SE': 'Sergipe', 'TO': 'Tocantins'
+}
+
+# Verificar existência dos arquivos CSV (e do arquivo de avaliações nas fontes locais)
 def check_files_exist():
     files = [CUSTOMERS_FILE, ORDER_ITEMS_FILE, ORDER_PAYMENTS_FILE, ORDERS_FILE, PRODUCTS_FILE]
     missing_files = []
@@ -50,6 +90,9 @@ def check_files_exist():
         if not os.path.exists(file):
             missing_files.append(file)
     
+    if REVIEWS_SOURCE in ("json", "mongomock") and reviews_json_path() is None:
+        missing_files.append(f"{REVIEWS_JSON_FILE} (ou {MONGO_INIT_FILE})")
+    
     if missing_files:
         print(f"ERRO: Os seguintes arquivos não foram encontrados:")
         for file in missing_files:
@@ -66,6 +109,129 @@ def check_files_exist():
     else:
         print("Todos os arquivos CSV foram encontrados.")
 
+# Monta o comando INSERT portável (PostgreSQL, DuckDB e SQLite aceitam ON CONFLICT)
+def build_insert_sql(table, columns, values_clause, conflict_column=None, update_columns=()):
+    query = f"INSERT INTO {table} ({', '.join(columns)}) {values_clause}"
+    if conflict_column:
+        if update_columns:
+            updates = ", ".join(f"{col} = EXCLUDED.{col}" for col in update_columns)
+            query += f" ON CONFLICT ({conflict_column}) DO UPDATE SET {updates}"
+        else:
+            query += f" ON CONFLICT ({conflict_column}) DO NOTHING"
+    return query
+
+# Converte o DataFrame para objetos Python, trocando NaN/NaT por None
+def to_python_objects(df):
+    df = df.astype(object)
+    return df.where(df.notna(), None)
+
+# Destino genérico do Data Warehouse; cada backend define sua chave
+# sequencial e seu caminho de carga em lote mais rápido
+class DWTarget(ABC):
+    def __init__(self, conn):
+        self.conn = conn
+
+    @abstractmethod
+    def identity_column(self, table):
+        pass
+
+    def create_table(self, table, ddl):
+        self.execute(ddl.format(pk=self.identity_column(table)))
+
+    def execute(self, query, params=None):
+        cursor = self.conn.cursor()
+        cursor.execute(query, params or ())
+        return cursor
+
+    # Retorna {chave: id} para mapear chaves naturais em chaves substitutas.
+    # As chaves são normalizadas como texto para que datas e horas
+    # tenham a mesma representação em todos os backends.
+    def fetch_key_map(self, query):
+        rows = self.execute(query).fetchall()
+        return {str(key): value for key, value in rows if key is not None}
+
+    def bulk_insert(self, table, df, conflict_column=None, update_columns=()):
+        if df.empty:
+            return
+        if conflict_column:
+            # Um mesmo comando não pode atualizar a mesma chave duas vezes
+            df = df.drop_duplicates(subset=[conflict_column], keep="last")
+        self._bulk_insert(table, to_python_objects(df), conflict_column, update_columns)
+
+    @abstractmethod
+    def _bulk_insert(self, table, df, conflict_column, update_columns):
+        pass
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.close()
+
+class PostgresTarget(DWTarget):
+    def identity_column(self, table):
+        return "SERIAL PRIMARY KEY"
+
+    def _bulk_insert(self, table, df, conflict_column, update_columns):
+        query = build_insert_sql(table, list(df.columns), "VALUES %s", conflict_column, update_columns)
+        cursor = self.conn.cursor()
+        execute_values(cursor, query, list(df.itertuples(index=False, name=None)), page_size=BULK_PAGE_SIZE)
+        cursor.close()
+
+class DuckDBTarget(DWTarget):
+    def identity_column(self, table):
+        return f"INTEGER PRIMARY KEY DEFAULT nextval('seq_{table}')"
+
+    def create_table(self, table, ddl):
+        self.conn.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_{table}")
+        super().create_table(table, ddl)
+
+    # Os cursores do DuckDB abrem outra conexão (e outra transação);
+    # por isso os comandos são executados na própria conexão
+    def execute(self, query, params=None):
+        return self.conn.execute(query, params or ())
+
+    def _bulk_insert(self, table, df, conflict_column, update_columns):
+        # O DuckDB lê o DataFrame diretamente, sem serializar linha a linha
+        columns = list(df.columns)
+        query = build_insert_sql(
+            table, columns, f"SELECT {', '.join(columns)} FROM etl_stage", conflict_column, update_columns
+        )
+        self.conn.register("etl_stage", df)
+        try:
+            self.conn.execute(query)
+        finally:
+            self.conn.unregister("etl_stage")
+
+    # O DuckDB trabalha em autocommit; reabre a transação a cada
+    # commit/rollback para manter a mesma semântica dos demais backends
+    def commit(self):
+        self.conn.commit()
+        self.conn.execute("BEGIN TRANSACTION")
+
+    def rollback(self):
+        self.conn.rollback()
+        self.conn.execute("BEGIN TRANSACTION")
+
+class SQLiteTarget(DWTarget):
+    placeholder = "?"
+
+    def identity_column(self, table):
+        return "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def _bulk_insert(self, table, df, conflict_column, update_columns):
+        values_clause = f"VALUES ({', '.join([self.placeholder] * len(df.columns))})"
+        query = build_insert_sql(table, list(df.columns), values_clause, conflict_column, update_columns)
+        self.conn.executemany(query, df.itertuples(index=False, name=None))
+
+# O SQLite não converte datas e horas nativamente; grava no formato ISO
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+sqlite3.register_adapter(dt_time, dt_time.isoformat)
+
 # Função para criar conexão com o PostgreSQL
 def create_postgres_connection():
     try:
@@ -98,6 +264,25 @@ def create_postgres_connection():
         print(f"Erro inesperado ao conectar ao PostgreSQL: {e}")
         raise
 
+# Função para criar o destino do Data Warehouse conforme DW_TARGET
+def create_dw_target():
+    if DW_TARGET == "postgres":
+        return PostgresTarget(create_postgres_connection())
+    if DW_TARGET == "duckdb":
+        try:
+            import duckdb
+        except ImportError:
+            print("O destino 'duckdb' requer o pacote duckdb (pip install -r requirements-dev.txt)")
+            raise
+        conn = duckdb.connect(DW_LOCAL_PATH)
+        conn.execute("BEGIN TRANSACTION")
+        return DuckDBTarget(conn)
+    if DW_TARGET == "sqlite":
+        conn = sqlite3.connect(DW_LOCAL_PATH)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return SQLiteTarget(conn)
+    raise ValueError(f"DW_TARGET inválido: '{DW_TARGET}'. Use 'postgres', 'duckdb' ou 'sqlite'.")
+
 # Função para criar conexão com o MongoDB
 def create_mongo_connection():
     try:
@@ -130,16 +315,351 @@ def create_mongo_connection():
         print(f"Erro inesperado ao conectar ao MongoDB: {e}")
         raise
 
+# Arquivo de onde as avaliações locais serão lidas: o JSON exportado,
+# se existir, ou o init.js do MongoDB; None se nenhum existir
+def reviews_json_path():
+    for path in (REVIEWS_JSON_FILE, MONGO_INIT_FILE):
+        if os.path.exists(path):
+            return path
+    return None
+
+# Ler as avaliações do arquivo JSON (array ou JSON Lines) ou, na falta
+# dele, do array passado a insertMany([...]) no init.js do MongoDB
+def read_reviews_json():
+    path = reviews_json_path()
+    if path is None:
+        raise FileNotFoundError(f"Arquivo de avaliações não encontrado: {REVIEWS_JSON_FILE} (ou {MONGO_INIT_FILE})")
+    with open(path, encoding="utf-8") as f:
+        content = f.read().strip()
+    if path != REVIEWS_JSON_FILE:
+        print(f"Lendo avaliações de {path}")
+        start = content.index("[", content.index("insertMany("))
+        return json.JSONDecoder().raw_decode(content, start)[0]
+    if content.startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+# Função para criar a fonte das avaliações conforme REVIEWS_SOURCE.
+# Retorna um cliente compatível com pymongo, ou None para a fonte "json".
+def create_reviews_source():
+    if REVIEWS_SOURCE == "mongo":
+        return create_mongo_connection()
+    if REVIEWS_SOURCE == "mongomock":
+        try:
+            import mongomock
+        except ImportError:
+            print("A fonte 'mongomock' requer o pacote mongomock (pip install -r requirements-dev.txt)")
+            raise
+        client = mongomock.MongoClient()
+        reviews = read_reviews_json()
+        if reviews:
+            client[MONGO_DB][MONGO_COLLECTION].insert_many(reviews)
+        return client
+    if REVIEWS_SOURCE == "json":
+        return None
+    raise ValueError(f"REVIEWS_SOURCE inválido: '{REVIEWS_SOURCE}'. Use 'mongo', 'mongomock' ou 'json'.")
+
+# Obter as avaliações como DataFrame, do MongoDB ou do arquivo JSON
+def read_reviews(mongo_client):
+    if mongo_client is None:
+        return pd.DataFrame(read_reviews_json())
+    collection = mongo_client[MONGO_DB][MONGO_COLLECTION]
+    # Projeção evita trafegar os textos das avaliações, que não são usados
+    reviews_cursor = collection.find({}, {"_id": 0, "order_id": 1, "review_score": 1})
+    return pd.DataFrame(list(reviews_cursor))
+
+# Extrair todas as fontes uma única vez, em paralelo.
+# Retorna {fonte: DataFrame} na ordem de declaração das fontes.
+def extract_sources(mongo_client):
+    print("Extraindo dados das fontes...")
+    readers = {
+        'customers': lambda: pd.read_csv(CUSTOMERS_FILE),
+        'products': lambda: pd.read_csv(PRODUCTS_FILE),
+        'orders': lambda: pd.read_csv(ORDERS_FILE),
+        'order_items': lambda: pd.read_csv(ORDER_ITEMS_FILE),
+        'order_payments': lambda: pd.read_csv(ORDER_PAYMENTS_FILE),
+        'order_reviews': lambda: read_reviews(mongo_client)
+    }
+    with ThreadPoolExecutor(max_workers=DQ_WORKERS) as executor:
+        frames = list(executor.map(lambda reader: reader(), readers.values()))
+    return dict(zip(readers.keys(), frames))
+
+# Regras de qualidade vetorizadas: cada uma recebe o DataFrame da fonte
+# e retorna uma máscara booleana com True para as linhas válidas.
+# Se alguma coluna da regra não existir na fonte (por exemplo, documentos
+# do MongoDB sem o campo), todas as linhas são reprovadas pela regra.
+def with_columns(columns, check):
+    def guarded(df):
+        if any(column not in df.columns for column in columns):
+            return pd.Series(False, index=df.index)
+        return check(df)
+    return guarded
+
+def not_null(*columns):
+    return with_columns(columns, lambda df: df[list(columns)].notna().all(axis=1))
+
+def non_negative(column, nullable=False):
+    def check(df):
+        valid = pd.to_numeric(df[column], errors='coerce') >= 0
+        return valid | df[column].isna() if nullable else valid
+    return with_columns([column], check)
+
+def in_range(column, low, high, integer=False):
+    def check(df):
+        values = pd.to_numeric(df[column], errors='coerce')
+        valid = values.between(low, high)
+        return valid & (values % 1 == 0) if integer else valid
+    return with_columns([column], check)
+
+def non_negative_integer(column, nullable=False):
+    def check(df):
+        values = pd.to_numeric(df[column], errors='coerce')
+        valid = (values >= 0) & (values % 1 == 0)
+        return valid | df[column].isna() if nullable else valid
+    return with_columns([column], check)
+
+def in_set(column, values):
+    return with_columns([column], lambda df: df[column].isin(list(values)))
+
+# Aceita valores ausentes, mas rejeita textos que viram NaT ao converter
+def valid_timestamp(column, nullable=True):
+    def check(df):
+        valid = pd.to_datetime(df[column], errors='coerce').notna()
+        return valid | df[column].isna() if nullable else valid
+    return with_columns([column], check)
+
+# Regras aplicadas a cada fonte antes da carga: (nome da regra, verificação)
+QUALITY_CHECKS = {
+    'customers': [
+        ('customer_id_obrigatorio', not_null('customer_id')),
+        ('customer_state_conhecido', in_set('customer_state', ESTADOS_MAP)),
+    ],
+    'products': [
+        ('product_id_obrigatorio', not_null('product_id')),
+        ('product_name_lenght_inteiro_nao_negativo', non_negative_integer('product_name_lenght', nullable=True)),
+        ('product_description_lenght_inteiro_nao_negativo',
+         non_negative_integer('product_description_lenght', nullable=True)),
+        ('product_photos_qty_inteiro_nao_negativo', non_negative_integer('product_photos_qty', nullable=True)),
+        ('product_weight_g_nao_negativo', non_negative('product_weight_g', nullable=True)),
+        ('product_length_cm_nao_negativo', non_negative('product_length_cm', nullable=True)),
+        ('product_height_cm_nao_negativo', non_negative('product_height_cm', nullable=True)),
+        ('product_width_cm_nao_negativo', non_negative('product_width_cm', nullable=True)),
+    ],
+    'orders': [
+        ('order_chaves_obrigatorias', not_null('order_id', 'customer_id')),
+        ('order_purchase_timestamp_valido', valid_timestamp('order_purchase_timestamp', nullable=False)),
+        ('order_approved_at_valido', valid_timestamp('order_approved_at')),
+        ('order_delivered_carrier_date_valido', valid_timestamp('order_delivered_carrier_date')),
+        ('order_delivered_customer_date_valido', valid_timestamp('order_delivered_customer_date')),
+        ('order_estimated_delivery_date_valido', valid_timestamp('order_estimated_delivery_date')),
+    ],
+    'order_items': [
+        ('order_item_chaves_obrigatorias', not_null('order_id', 'product_id')),
+        ('price_nao_negativo', non_negative('price')),
+        ('freight_value_nao_negativo', non_negative('freight_value')),
+    ],
+    'order_payments': [
+        ('order_id_obrigatorio', not_null('order_id')),
+        ('payment_value_nao_negativo', non_negative('payment_value')),
+        ('payment_installments_inteiro_nao_negativo', non_negative_integer('payment_installments')),
+    ],
+    'order_reviews': [
+        ('order_id_obrigatorio', not_null('order_id')),
+        ('review_score_entre_1_e_5', in_range('review_score', 1, 5, integer=True)),
+    ],
+}
+
+# Tipos das colunas validadas; depois da validação, as linhas válidas são
+# convertidas para que um valor rejeitado (por exemplo, um texto numa
+# coluna numérica) não deixe o restante da coluna como texto
+QUALITY_TYPES = {
+    'products': {
+        'product_name_lenght': 'integer',
+        'product_description_lenght': 'integer',
+        'product_photos_qty': 'integer',
+        'product_weight_g': 'numeric',
+        'product_length_cm': 'numeric',
+        'product_height_cm': 'numeric',
+        'product_width_cm': 'numeric',
+    },
+    'orders': {
+        'order_purchase_timestamp': 'timestamp',
+        'order_approved_at': 'timestamp',
+        'order_delivered_carrier_date': 'timestamp',
+        'order_delivered_customer_date': 'timestamp',
+        'order_estimated_delivery_date': 'timestamp',
+    },
+    'order_items': {'price': 'numeric', 'freight_value': 'numeric'},
+    'order_payments': {'payment_value': 'numeric', 'payment_installments': 'integer'},
+    'order_reviews': {'review_score': 'integer'},
+}
+
+# Converter as colunas de QUALITY_TYPES presentes no DataFrame
+def coerce_types(fonte, df):
+    df = df.copy()
+    for column, kind in QUALITY_TYPES.get(fonte, {}).items():
+        if column not in df.columns:
+            continue
+        if kind == 'timestamp':
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+        elif kind == 'integer':
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    return df
+
+# Relações entre as fontes: (fonte, coluna, fonte pai, coluna no pai).
+# Linhas que apontam para um pai rejeitado também vão para a quarentena.
+QUALITY_DEPENDENCIES = [
+    ('orders', 'customer_id', 'customers', 'customer_id'),
+    ('order_items', 'product_id', 'products', 'product_id'),
+]
+
+# Fontes que compõem um pedido; se qualquer linha de um pedido for
+# rejeitada, o pedido inteiro sai da carga para que nenhum fato seja
+# montado com itens ou pagamentos parciais
+ORDER_SOURCES = ['orders', 'order_items', 'order_payments', 'order_reviews']
+
+# Aplicar as regras de uma fonte, medindo o tempo de cada regra.
+# Retorna um DataFrame booleano (uma coluna por regra, True quando a
+# linha viola a regra) e as métricas por regra.
+def check_frame(fonte, df):
+    metrics = []
+    failures = pd.DataFrame(index=df.index)
+    
+    for regra, check in QUALITY_CHECKS.get(fonte, []):
+        inicio = time.perf_counter()
+        if df.empty:
+            failures[regra] = pd.Series(False, index=df.index, dtype=bool)
+        else:
+            failures[regra] = ~check(df).fillna(False).astype(bool)
+        metrics.append({
+            'fonte': fonte,
+            'regra': regra,
+            'rejeitadas': int(failures[regra].sum()),
+            'segundos': time.perf_counter() - inicio
+        })
+    
+    return failures, metrics
+
+# Separar as linhas válidas (na ordem original, já com os tipos de
+# QUALITY_TYPES) das rejeitadas, montando os registros de quarentena
+# com as regras violadas
+def split_rejects(fonte, df, failures):
+    rejected_mask = failures.any(axis=1) if not failures.empty else pd.Series(False, index=df.index)
+    rejected = df[rejected_mask]
+    rejects_df = pd.DataFrame(columns=['fonte', 'regras', 'linha', 'registro'])
+    if not rejected.empty:
+        # Lista as regras violadas por linha sem iterar sobre as linhas
+        rejected_failures = failures[rejected_mask]
+        regras = rejected_failures.dot(rejected_failures.columns + ',').str.rstrip(',')
+        registros = rejected.to_json(
+            orient='records', lines=True, date_format='iso', force_ascii=False, default_handler=str
+        ).splitlines()
+        rejects_df = pd.DataFrame({
+            'fonte': fonte,
+            'regras': regras.values,
+            'linha': rejected.index.astype('int64'),
+            'registro': registros
+        })
+    
+    return coerce_types(fonte, df[~rejected_mask]), rejects_df
+
+# Aplicar as regras de uma única fonte: retorna as linhas válidas,
+# as linhas rejeitadas para quarentena e as métricas por regra
+def validate_frame(fonte, df):
+    failures, metrics = check_frame(fonte, df)
+    valid_df, rejects_df = split_rejects(fonte, df, failures)
+    return valid_df, rejects_df, metrics
+
+# Valores de uma coluna nas linhas já rejeitadas da fonte
+def rejected_keys(df, failures, column):
+    if column not in df.columns:
+        return pd.Series(dtype=object)
+    return df.loc[failures.any(axis=1), column].dropna()
+
+# Marcar uma nova regra nas linhas ainda válidas cujo valor em
+# `column` está em `keys`, registrando a métrica da regra
+def flag_dependents(fonte, df, failures, metrics, regra, column, keys):
+    inicio = time.perf_counter()
+    if column in df.columns and not df.empty:
+        failures[regra] = df[column].isin(keys) & ~failures.any(axis=1)
+    else:
+        failures[regra] = pd.Series(False, index=df.index, dtype=bool)
+    metrics.append({
+        'fonte': fonte,
+        'regra': regra,
+        'rejeitadas': int(failures[regra].sum()),
+        'segundos': time.perf_counter() - inicio
+    })
+
+# Propagar as rejeições para as linhas dependentes: primeiro pelas
+# relações de QUALITY_DEPENDENCIES e depois para o pedido inteiro
+def propagate_rejections(frames, failures, metrics):
+    for fonte, column, pai, pai_column in QUALITY_DEPENDENCIES:
+        if fonte in frames and pai in frames:
+            keys = rejected_keys(frames[pai], failures[pai], pai_column)
+            flag_dependents(fonte, frames[fonte], failures[fonte], metrics[fonte],
+                            f'{pai}_pai_rejeitado', column, keys)
+    
+    fontes = [fonte for fonte in ORDER_SOURCES if fonte in frames]
+    pedidos = pd.concat([pd.Series(dtype=object)] + [
+        rejected_keys(frames[fonte], failures[fonte], 'order_id') for fonte in fontes
+    ])
+    for fonte in fontes:
+        regra = 'dependente_rejeitado' if fonte == 'orders' else 'orders_pai_rejeitado'
+        flag_dependents(fonte, frames[fonte], failures[fonte], metrics[fonte], regra, 'order_id', pedidos)
+
+# Etapa de qualidade de dados: valida as fontes em paralelo, propaga
+# as rejeições para as linhas dependentes, grava as linhas rejeitadas
+# em lote na tabela dq_rejeicoes (identificadas pela execução) e
+# devolve apenas as linhas válidas para as etapas de carga
+def validate_sources(target, frames, execucao_id):
+    print("Validando qualidade dos dados...")
+    with ThreadPoolExecutor(max_workers=DQ_WORKERS) as executor:
+        results = list(executor.map(check_frame, frames.keys(), frames.values()))
+    failures = {fonte: result[0] for fonte, result in zip(frames.keys(), results)}
+    metrics = {fonte: result[1] for fonte, result in zip(frames.keys(), results)}
+    
+    propagate_rejections(frames, failures, metrics)
+    
+    valid_frames = {}
+    all_rejects = []
+    report = []
+    for fonte, df in frames.items():
+        valid_df, rejects_df = split_rejects(fonte, df, failures[fonte])
+        valid_frames[fonte] = valid_df
+        all_rejects.append(rejects_df)
+        report.extend(metrics[fonte])
+        for m in metrics[fonte]:
+            print(f"  [{fonte}] {m['regra']}: {m['rejeitadas']} linha(s) rejeitada(s) em {m['segundos']:.3f}s")
+        print(f"  [{fonte}] {len(valid_df)} linha(s) válida(s), {len(rejects_df)} em quarentena")
+    
+    rejects = [r for r in all_rejects if not r.empty]
+    rejects = pd.concat(rejects, ignore_index=True) if rejects else pd.DataFrame()
+    if not rejects.empty:
+        rejects.insert(0, 'execucao_id', execucao_id)
+    try:
+        target.bulk_insert('dq_rejeicoes', rejects)
+        target.commit()
+    except Exception as e:
+        print(f"Erro ao gravar linhas rejeitadas: {e}")
+        target.rollback()
+        raise
+    
+    print(f"Validação concluída: {len(rejects)} linha(s) em quarentena na tabela dq_rejeicoes")
+    return valid_frames, report
+
 # Função para criar as tabelas do data warehouse
-def create_dw_tables(conn):
+def create_dw_tables(target):
     print("Criando tabelas do Data Warehouse...")
-    cursor = conn.cursor()
-    
+
     # Criação das tabelas de dimensão e fato
-    cursor.execute("""
+    # {pk} é substituído pela chave sequencial de cada backend
+    target.create_table("dim_cliente", """
         -- Dimensão Cliente
         CREATE TABLE IF NOT EXISTS dim_cliente (
-            cliente_id SERIAL PRIMARY KEY,
+            cliente_id {pk},
             cliente_key VARCHAR(50) UNIQUE NOT NULL,
             cliente_cidade VARCHAR(100),
             cliente_estado VARCHAR(2),
@@ -148,10 +668,10 @@ def create_dw_tables(conn):
         );
     """)
     
-    cursor.execute("""
+    target.create_table("dim_produto", """
         -- Dimensão Produto
         CREATE TABLE IF NOT EXISTS dim_produto (
-            produto_id SERIAL PRIMARY KEY,
+            produto_id {pk},
             produto_key VARCHAR(50) UNIQUE NOT NULL,
             produto_categoria_id INTEGER,
             produto_nome_comprimento INTEGER,
@@ -165,29 +685,29 @@ def create_dw_tables(conn):
         );
     """)
     
-    cursor.execute("""
+    target.create_table("dim_categoria_produto", """
         -- Dimensão Categoria de Produto
         CREATE TABLE IF NOT EXISTS dim_categoria_produto (
-            categoria_id SERIAL PRIMARY KEY,
+            categoria_id {pk},
             categoria_nome VARCHAR(100) UNIQUE NOT NULL,
             data_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
     """)
     
-    cursor.execute("""
+    target.create_table("dim_estado", """
         -- Dimensão Estado
         CREATE TABLE IF NOT EXISTS dim_estado (
-            estado_id SERIAL PRIMARY KEY,
+            estado_id {pk},
             estado_sigla VARCHAR(2) UNIQUE NOT NULL,
             estado_nome VARCHAR(50),
             data_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
     """)
     
-    cursor.execute("""
+    target.create_table("dim_data", """
         -- Dimensão Data
         CREATE TABLE IF NOT EXISTS dim_data (
-            data_id SERIAL PRIMARY KEY,
+            data_id {pk},
             data_completa DATE UNIQUE NOT NULL,
             dia INTEGER,
             mes INTEGER,
@@ -200,10 +720,10 @@ def create_dw_tables(conn):
         );
     """)
     
-    cursor.execute("""
+    target.create_table("dim_hora", """
         -- Dimensão Hora
         CREATE TABLE IF NOT EXISTS dim_hora (
-            hora_id SERIAL PRIMARY KEY,
+            hora_id {pk},
             hora_completa TIME UNIQUE NOT NULL,
             hora INTEGER,
             minuto INTEGER,
@@ -213,19 +733,19 @@ def create_dw_tables(conn):
         );
     """)
     
-    cursor.execute("""
+    target.create_table("dim_tipo_pagamento", """
         -- Dimensão Tipo de Pagamento
         CREATE TABLE IF NOT EXISTS dim_tipo_pagamento (
-            tipo_pagamento_id SERIAL PRIMARY KEY,
+            tipo_pagamento_id {pk},
             tipo_pagamento VARCHAR(50) UNIQUE NOT NULL,
             data_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
     """)
     
-    cursor.execute("""
+    target.create_table("fato_vendas", """
         -- Tabela Fato Vendas
         CREATE TABLE IF NOT EXISTS fato_vendas (
-            venda_id SERIAL PRIMARY KEY,
+            venda_id {pk},
             order_id VARCHAR(50) NOT NULL,
             cliente_id INTEGER REFERENCES dim_cliente(cliente_id),
             produto_id INTEGER REFERENCES dim_produto(produto_id),
@@ -242,255 +762,177 @@ def create_dw_tables(conn):
         );
     """)
     
-    conn.commit()
+    target.create_table("dq_rejeicoes", """
+        -- Quarentena da validação de qualidade de dados
+        CREATE TABLE IF NOT EXISTS dq_rejeicoes (
+            rejeicao_id {pk},
+            execucao_id VARCHAR(32) NOT NULL,
+            fonte VARCHAR(50) NOT NULL,
+            regras VARCHAR(1000) NOT NULL,
+            linha INTEGER,
+            registro TEXT,
+            data_carga TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    
+    target.commit()
     print("Tabelas criadas com sucesso!")
 
 # Função para carregar dados nas dimensões
-def load_dimension_data(conn):
+def load_dimension_data(target, frames):
     print("Carregando dados nas tabelas de dimensão...")
-    
+
     # Carregar Dimensão Cliente
     def load_dim_cliente():
         print("Carregando dimensão Cliente...")
         try:
-            customers_df = pd.read_csv(CUSTOMERS_FILE)
-            cursor = conn.cursor()
+            customers_df = frames['customers']
             
-            # Processar cada cliente e inserir na dimensão
-            for _, row in customers_df.iterrows():
-                cursor.execute(
-                    """
-                    INSERT INTO dim_cliente (cliente_key, cliente_cidade, cliente_estado, cliente_zip_code)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (cliente_key) DO UPDATE SET
-                        cliente_cidade = EXCLUDED.cliente_cidade,
-                        cliente_estado = EXCLUDED.cliente_estado,
-                        cliente_zip_code = EXCLUDED.cliente_zip_code
-                    """,
-                    (
-                        row['customer_id'],
-                        row['customer_city'],
-                        row['customer_state'],
-                        row['customer_zip_code_prefix']
-                    )
-                )
+            dim_df = pd.DataFrame({
+                'cliente_key': customers_df['customer_id'],
+                'cliente_cidade': customers_df['customer_city'],
+                'cliente_estado': customers_df['customer_state'],
+                'cliente_zip_code': customers_df['customer_zip_code_prefix'].astype('string')
+            })
+            target.bulk_insert(
+                'dim_cliente', dim_df, 'cliente_key',
+                ['cliente_cidade', 'cliente_estado', 'cliente_zip_code']
+            )
             
-            conn.commit()
+            target.commit()
             print("Dimensão Cliente carregada com sucesso!")
         except Exception as e:
             print(f"Erro ao carregar dimensão Cliente: {e}")
-            conn.rollback()
-    
+            target.rollback()
+
     # Carregar Dimensão Estado
     def load_dim_estado():
         print("Carregando dimensão Estado...")
         try:
-            customers_df = pd.read_csv(CUSTOMERS_FILE)
-            estados_unicos = customers_df['customer_state'].unique()
-            
-            # Mapeamento de siglas para nomes completos dos estados brasileiros
-            estados_map = {
-                'AC': 'Acre', 'AL': 'Alagoas', 'AP': 'Amapá', 'AM': 'Amazonas',
-                'BA': 'Bahia', 'CE': 'Ceará', 'DF': 'Distrito Federal', 'ES': 'Espírito Santo',
-                'GO': 'Goiás', 'MA': 'Maranhão', 'MT': 'Mato Grosso', 'MS': 'Mato Grosso do Sul',
-                'MG': 'Minas Gerais', 'PA': 'Pará', 'PB': 'Paraíba', 'PR': 'Paraná',
-                'PE': 'Pernambuco', 'PI': 'Piauí', 'RJ': 'Rio de Janeiro', 'RN': 'Rio Grande do Norte',
-                'RS': 'Rio Grande do Sul', 'RO': 'Rondônia', 'RR': 'Roraima', 'SC': 'Santa Catarina',
-                'SP': 'São Paulo', 'SE': 'Sergipe', 'TO': 'Tocantins'
-            }
-            
-            cursor = conn.cursor()
+            customers_df = frames['customers']
+            estados_unicos = customers_df['customer_state'].dropna().unique()
             
             # Inserir estados únicos na dimensão
-            for estado_sigla in estados_unicos:
-                estado_nome = estados_map.get(estado_sigla, 'Desconhecido')
-                cursor.execute(
-                    """
-                    INSERT INTO dim_estado (estado_sigla, estado_nome)
-                    VALUES (%s, %s)
-                    ON CONFLICT (estado_sigla) DO UPDATE SET
-                        estado_nome = EXCLUDED.estado_nome
-                    """,
-                    (estado_sigla, estado_nome)
-                )
+            dim_df = pd.DataFrame({'estado_sigla': estados_unicos})
+            dim_df['estado_nome'] = dim_df['estado_sigla'].map(ESTADOS_MAP).fillna('Desconhecido')
+            target.bulk_insert('dim_estado', dim_df, 'estado_sigla', ['estado_nome'])
             
-            conn.commit()
+            target.commit()
             print("Dimensão Estado carregada com sucesso!")
         except Exception as e:
             print(f"Erro ao carregar dimensão Estado: {e}")
-            conn.rollback()
-    
+            target.rollback()
+
     # Carregar Dimensão Produto e Categoria
     def load_dim_produto_categoria():
         print("Carregando dimensões Produto e Categoria...")
         try:
-            products_df = pd.read_csv(PRODUCTS_FILE)
-            cursor = conn.cursor()
+            products_df = frames['products']
             
             # Primeiro, carregar categorias únicas
             categorias_unicas = products_df['product_category_name'].dropna().unique()
-            for categoria in categorias_unicas:
-                cursor.execute(
-                    """
-                    INSERT INTO dim_categoria_produto (categoria_nome)
-                    VALUES (%s)
-                    ON CONFLICT (categoria_nome) DO NOTHING
-                    """,
-                    (categoria,)
-                )
+            target.bulk_insert(
+                'dim_categoria_produto',
+                pd.DataFrame({'categoria_nome': categorias_unicas}),
+                'categoria_nome'
+            )
             
-            conn.commit()
+            target.commit()
             
             # Agora, carregar produtos com referência às categorias
-            for _, row in products_df.iterrows():
-                # Obter o ID da categoria se existir
-                categoria_id = None
-                if pd.notna(row['product_category_name']):
-                    cursor.execute(
-                        "SELECT categoria_id FROM dim_categoria_produto WHERE categoria_nome = %s",
-                        (row['product_category_name'],)
-                    )
-                    result = cursor.fetchone()
-                    if result:
-                        categoria_id = result[0]
-                
-                cursor.execute(
-                    """
-                    INSERT INTO dim_produto (
-                        produto_key, produto_categoria_id, produto_nome_comprimento,
-                        produto_descricao_comprimento, produto_fotos_qtd,
-                        produto_peso_g, produto_comprimento_cm, produto_altura_cm, produto_largura_cm
-                    )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (produto_key) DO UPDATE SET
-                        produto_categoria_id = EXCLUDED.produto_categoria_id,
-                        produto_nome_comprimento = EXCLUDED.produto_nome_comprimento,
-                        produto_descricao_comprimento = EXCLUDED.produto_descricao_comprimento,
-                        produto_fotos_qtd = EXCLUDED.produto_fotos_qtd,
-                        produto_peso_g = EXCLUDED.produto_peso_g,
-                        produto_comprimento_cm = EXCLUDED.produto_comprimento_cm,
-                        produto_altura_cm = EXCLUDED.produto_altura_cm,
-                        produto_largura_cm = EXCLUDED.produto_largura_cm
-                    """,
-                    (
-                        row['product_id'],
-                        categoria_id,
-                        row['product_name_lenght'] if pd.notna(row['product_name_lenght']) else None,
-                        row['product_description_lenght'] if pd.notna(row['product_description_lenght']) else None,
-                        row['product_photos_qty'] if pd.notna(row['product_photos_qty']) else None,
-                        row['product_weight_g'] if pd.notna(row['product_weight_g']) else None,
-                        row['product_length_cm'] if pd.notna(row['product_length_cm']) else None,
-                        row['product_height_cm'] if pd.notna(row['product_height_cm']) else None,
-                        row['product_width_cm'] if pd.notna(row['product_width_cm']) else None
-                    )
-                )
+            categorias = target.fetch_key_map(
+                "SELECT categoria_nome, categoria_id FROM dim_categoria_produto"
+            )
+            dim_df = pd.DataFrame({
+                'produto_key': products_df['product_id'],
+                'produto_categoria_id': products_df['product_category_name'].map(categorias).astype('Int64'),
+                'produto_nome_comprimento': products_df['product_name_lenght'].astype('Int64'),
+                'produto_descricao_comprimento': products_df['product_description_lenght'].astype('Int64'),
+                'produto_fotos_qtd': products_df['product_photos_qty'].astype('Int64'),
+                'produto_peso_g': products_df['product_weight_g'],
+                'produto_comprimento_cm': products_df['product_length_cm'],
+                'produto_altura_cm': products_df['product_height_cm'],
+                'produto_largura_cm': products_df['product_width_cm']
+            })
+            target.bulk_insert(
+                'dim_produto', dim_df, 'produto_key',
+                [col for col in dim_df.columns if col != 'produto_key']
+            )
             
-            conn.commit()
+            target.commit()
             print("Dimensões Produto e Categoria carregadas com sucesso!")
         except Exception as e:
             print(f"Erro ao carregar dimensões Produto e Categoria: {e}")
-            conn.rollback()
-    
+            target.rollback()
+
     # Carregar Dimensão Tipo de Pagamento
     def load_dim_tipo_pagamento():
         print("Carregando dimensão Tipo de Pagamento...")
         try:
-            payments_df = pd.read_csv(ORDER_PAYMENTS_FILE)
-            tipos_pagamento = payments_df['payment_type'].unique()
+            payments_df = frames['order_payments']
+            tipos_pagamento = payments_df['payment_type'].dropna().unique()
             
-            cursor = conn.cursor()
-            
-            for tipo in tipos_pagamento:
-                cursor.execute(
-                    """
-                    INSERT INTO dim_tipo_pagamento (tipo_pagamento)
-                    VALUES (%s)
-                    ON CONFLICT (tipo_pagamento) DO NOTHING
-                    """,
-                    (tipo,)
-                )
+            target.bulk_insert(
+                'dim_tipo_pagamento',
+                pd.DataFrame({'tipo_pagamento': tipos_pagamento}),
+                'tipo_pagamento'
+            )
             
-            conn.commit()
+            target.commit()
             print("Dimensão Tipo de Pagamento carregada com sucesso!")
         except Exception as e:
             print(f"Erro ao carregar dimensão Tipo de Pagamento: {e}")
-            conn.rollback()
-    
+            target.rollback()
+
     # Carregar Dimensões Data e Hora
     def load_dim_data_hora():
         print("Carregando dimensões Data e Hora...")
         try:
-            orders_df = pd.read_csv(ORDERS_FILE)
+            orders_df = frames['orders'].copy()
             
             # Converter colunas de data para datetime
             date_columns = ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
             for col in date_columns:
                 orders_df[col] = pd.to_datetime(orders_df[col], errors='coerce')
             
-            # Extrair datas e horas únicas de todas as colunas de data
-            all_dates = set()
-            all_times = set()
-            
-            for col in date_columns:
-                # Extrair datas únicas
-                valid_dates = orders_df[col].dropna().dt.date.unique()
-                all_dates.update(valid_dates)
-                
-                # Extrair horas únicas
-                valid_times = orders_df[col].dropna().dt.time.unique()
-                all_times.update(valid_times)
-            
-            cursor = conn.cursor()
+            # Reunir os timestamps válidos de todas as colunas de data
+            timestamps = pd.concat([orders_df[col] for col in date_columns]).dropna()
             
             # Carregar dimensão Data
-            for date_val in all_dates:
-                if pd.notna(date_val):
-                    day = date_val.day
-                    month = date_val.month
-                    year = date_val.year
-                    weekday = date_val.weekday()
-                    weekday_name = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo'][weekday]
-                    month_name = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 
-                                 'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'][month-1]
-                    quarter = (month - 1) // 3 + 1
-                    
-                    cursor.execute(
-                        """
-                        INSERT INTO dim_data (
-                            data_completa, dia, mes, ano, dia_semana,
-                            nome_dia_semana, mes_nome, trimestre
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (data_completa) DO NOTHING
-                        """,
-                        (date_val, day, month, year, weekday, weekday_name, month_name, quarter)
-                    )
+            datas = pd.Series(timestamps.dt.normalize().unique())
+            weekday_names = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+            month_names = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+                           'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+            dim_data_df = pd.DataFrame({
+                'data_completa': datas.dt.date,
+                'dia': datas.dt.day,
+                'mes': datas.dt.month,
+                'ano': datas.dt.year,
+                'dia_semana': datas.dt.weekday,
+                'nome_dia_semana': datas.dt.weekday.map(lambda d: weekday_names[d]),
+                'mes_nome': datas.dt.month.map(lambda m: month_names[m - 1]),
+                'trimestre': datas.dt.quarter
+            })
+            target.bulk_insert('dim_data', dim_data_df, 'data_completa')
             
             # Carregar dimensão Hora
-            for time_val in all_times:
-                if pd.notna(time_val):
-                    hour = time_val.hour
-                    minute = time_val.minute
-                    second = time_val.second
-                    period = 'AM' if hour < 12 else 'PM'
-                    
-                    cursor.execute(
-                        """
-                        INSERT INTO dim_hora (
-                            hora_completa, hora, minuto, segundo, periodo
-                        )
-                        VALUES (%s, %s, %s, %s, %s)
-                        ON CONFLICT (hora_completa) DO NOTHING
-                        """,
-                        (time_val, hour, minute, second, period)
-                    )
+            horas = pd.DataFrame({
+                'hora': timestamps.dt.hour,
+                'minuto': timestamps.dt.minute,
+                'segundo': timestamps.dt.second
+            }).drop_duplicates().reset_index(drop=True)
+            horas.insert(0, 'hora_completa', [
+                dt_time(h, m, s) for h, m, s in zip(horas['hora'], horas['minuto'], horas['segundo'])
+            ])
+            horas['periodo'] = horas['hora'].map(lambda h: 'AM' if h < 12 else 'PM')
+            target.bulk_insert('dim_hora', horas, 'hora_completa')
             
-            conn.commit()
+            target.commit()
             print("Dimensões Data e Hora carregadas com sucesso!")
         except Exception as e:
             print(f"Erro ao carregar dimensões Data e Hora: {e}")
-            conn.rollback()
-    
+            target.rollback()
+
     # Executar carregamento de todas as dimensões
     load_dim_cliente()
     load_dim_estado()
@@ -499,32 +941,22 @@ def load_dimension_data(conn):
     load_dim_data_hora()
 
 # Função para carregar dados na tabela fato
-def load_fact_data(conn, mongo_client):
+def load_fact_data(target, frames):
     print("Carregando dados na tabela fato...")
     
     try:
-        # Carregar dados dos arquivos CSV
-        orders_df = pd.read_csv(ORDERS_FILE)
-        order_items_df = pd.read_csv(ORDER_ITEMS_FILE)
-        order_payments_df = pd.read_csv(ORDER_PAYMENTS_FILE)
+        # Usar os dados já extraídos e validados
+        orders_df = frames['orders'].copy()
+        order_items_df = frames['order_items']
+        order_payments_df = frames['order_payments']
         
         # Converter colunas de data para datetime
         date_columns = ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
         for col in date_columns:
             orders_df[col] = pd.to_datetime(orders_df[col], errors='coerce')
         
-        # Obter dados de revisões do MongoDB
-        db = mongo_client[MONGO_DB]
-        collection = db[MONGO_COLLECTION]
-        reviews_cursor = collection.find({})
-        reviews_list = list(reviews_cursor)
-        reviews_df = pd.DataFrame(reviews_list)
-        
-        # Converter colunas de data para datetime no DataFrame de revisões
-        if 'review_creation_date' in reviews_df.columns:
-            reviews_df['review_creation_date'] = pd.to_datetime(reviews_df['review_creation_date'], errors='coerce')
-        if 'review_answer_timestamp' in reviews_df.columns:
-            reviews_df['review_answer_timestamp'] = pd.to_datetime(reviews_df['review_answer_timestamp'], errors='coerce')
+        # Revisões do MongoDB (ou da fonte local configurada)
+        reviews_df = frames['order_reviews']
         
         # Juntar os DataFrames
         # 1. Juntar orders com order_items
@@ -535,7 +967,7 @@ def load_fact_data(conn, mongo_client):
         payment_agg = order_payments_df.groupby('order_id').agg({
             'payment_value': 'sum',
             'payment_installments': 'max',
-            'payment_type': lambda x: x.iloc[0] if len(x) > 0 else None
+            'payment_type': 'first'
         }).reset_index()
         
         merged_df = pd.merge(merged_df, payment_agg, on='order_id', how='left')
@@ -543,105 +975,75 @@ def load_fact_data(conn, mongo_client):
         # 3. Juntar com reviews do MongoDB
         if not reviews_df.empty and 'order_id' in reviews_df.columns:
             merged_df = pd.merge(merged_df, reviews_df[['order_id', 'review_score']], on='order_id', how='left')
+        else:
+            merged_df['review_score'] = None
         
-        # Preparar para inserção na tabela fato
-        cursor = conn.cursor()
+        # Obter IDs das dimensões com uma consulta por dimensão,
+        # em vez de uma consulta por linha da tabela fato
+        clientes = target.fetch_key_map("SELECT cliente_key, cliente_id FROM dim_cliente")
+        produtos = target.fetch_key_map("SELECT produto_key, produto_id FROM dim_produto")
+        estados = target.fetch_key_map(
+            "SELECT c.cliente_key, e.estado_id FROM dim_cliente c JOIN dim_estado e ON c.cliente_estado = e.estado_sigla"
+        )
+        datas = target.fetch_key_map("SELECT data_completa, data_id FROM dim_data")
+        horas = target.fetch_key_map("SELECT hora_completa, hora_id FROM dim_hora")
+        tipos_pagamento = target.fetch_key_map("SELECT tipo_pagamento, tipo_pagamento_id FROM dim_tipo_pagamento")
         
-        for _, row in merged_df.iterrows():
-            # Obter IDs das dimensões
-            
-            # Cliente ID
-            cursor.execute(
-                "SELECT cliente_id FROM dim_cliente WHERE cliente_key = %s",
-                (row['customer_id'],)
-            )
-            cliente_id_result = cursor.fetchone()
-            cliente_id = cliente_id_result[0] if cliente_id_result else None
-            
-            # Produto ID
-            cursor.execute(
-                "SELECT produto_id FROM dim_produto WHERE produto_key = %s",
-                (row['product_id'],)
-            )
-            produto_id_result = cursor.fetchone()
-            produto_id = produto_id_result[0] if produto_id_result else None
-            
-            # Estado ID
-            cursor.execute(
-                "SELECT c.cliente_estado, e.estado_id FROM dim_cliente c JOIN dim_estado e ON c.cliente_estado = e.estado_sigla WHERE c.cliente_key = %s",
-                (row['customer_id'],)
-            )
-            estado_result = cursor.fetchone()
-            estado_id = estado_result[1] if estado_result else None
-            
-            # Data ID (usando order_purchase_timestamp)
-            data_id = None
-            hora_id = None
-            if pd.notna(row['order_purchase_timestamp']):
-                purchase_date = row['order_purchase_timestamp'].date()
-                cursor.execute(
-                    "SELECT data_id FROM dim_data WHERE data_completa = %s",
-                    (purchase_date,)
-                )
-                data_id_result = cursor.fetchone()
-                data_id = data_id_result[0] if data_id_result else None
-                
-                # Hora ID (usando order_purchase_timestamp)
-                purchase_time = row['order_purchase_timestamp'].time()
-                cursor.execute(
-                    "SELECT hora_id FROM dim_hora WHERE hora_completa = %s",
-                    (purchase_time,)
-                )
-                hora_id_result = cursor.fetchone()
-                hora_id = hora_id_result[0] if hora_id_result else None
-            
-            # Tipo de Pagamento ID
-            tipo_pagamento_id = None
-            if pd.notna(row['payment_type']):
-                cursor.execute(
-                    "SELECT tipo_pagamento_id FROM dim_tipo_pagamento WHERE tipo_pagamento = %s",
-                    (row['payment_type'],)
-                )
-                tipo_pagamento_result = cursor.fetchone()
-                tipo_pagamento_id = tipo_pagamento_result[0] if tipo_pagamento_result else None
-            
-            # Inserir na tabela fato
-            cursor.execute(
-                """
-                INSERT INTO fato_vendas (
-                    order_id, cliente_id, produto_id, data_id, hora_id,
-                    estado_id, tipo_pagamento_id, review_score,
-                    valor_pago, numero_parcelas, preco_produto, custo_frete
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    row['order_id'],
-                    cliente_id,
-                    produto_id,
-                    data_id,
-                    hora_id,
-                    estado_id,
-                    tipo_pagamento_id,
-                    row['review_score'] if 'review_score' in row and pd.notna(row['review_score']) else None,
-                    row['payment_value'] if pd.notna(row['payment_value']) else None,
-                    row['payment_installments'] if pd.notna(row['payment_installments']) else None,
-                    row['price'] if pd.notna(row['price']) else None,
-                    row['freight_value'] if pd.notna(row['freight_value']) else None
-                )
-            )
+        # Data ID e Hora ID usando order_purchase_timestamp
+        purchase = merged_df['order_purchase_timestamp']
+        
+        fact_df = pd.DataFrame({
+            'order_id': merged_df['order_id'],
+            'cliente_id': merged_df['customer_id'].map(clientes).astype('Int64'),
+            'produto_id': merged_df['product_id'].map(produtos).astype('Int64'),
+            'data_id': purchase.dt.strftime('%Y-%m-%d').map(datas).astype('Int64'),
+            'hora_id': purchase.dt.strftime('%H:%M:%S').map(horas).astype('Int64'),
+            'estado_id': merged_df['customer_id'].map(estados).astype('Int64'),
+            'tipo_pagamento_id': merged_df['payment_type'].map(tipos_pagamento).astype('Int64'),
+            'review_score': pd.to_numeric(merged_df['review_score'], errors='coerce').astype('Int64'),
+            'valor_pago': merged_df['payment_value'],
+            'numero_parcelas': merged_df['payment_installments'].astype('Int64'),
+            'preco_produto': merged_df['price'],
+            'custo_frete': merged_df['freight_value']
+        })
+        
+        # Inserir na tabela fato em lote
+        target.bulk_insert('fato_vendas', fact_df)
         
-        conn.commit()
+        target.commit()
         print("Dados carregados na tabela fato com sucesso!")
     except Exception as e:
         print(f"Erro ao carregar dados na tabela fato: {e}")
-        conn.rollback()
+        target.rollback()
         raise
 
+# Executa as etapas do ETL, registrando o tempo de cada uma.
+# Pode ser chamada diretamente para medir o pipeline dentro do processo.
+# Retorna os tempos por etapa e as métricas de qualidade por regra.
+def run_etl(target, mongo_client):
+    timings = {}
+    # Identifica as linhas em quarentena gravadas por esta execução
+    execucao_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
+    print(f"Execução {execucao_id}")
+
+    def timed(etapa, func):
+        inicio = time.perf_counter()
+        result = func()
+        timings[etapa] = time.perf_counter() - inicio
+        print(f"Etapa {etapa} concluída em {timings[etapa]:.2f}s")
+        return result
+    
+    timed("create_dw_tables", lambda: create_dw_tables(target))
+    frames = timed("extract_sources", lambda: extract_sources(mongo_client))
+    frames, quality_report = timed("validate_sources", lambda: validate_sources(target, frames, execucao_id))
+    timed("load_dimension_data", lambda: load_dimension_data(target, frames))
+    timed("load_fact_data", lambda: load_fact_data(target, frames))
+    return timings, quality_report
+
 # Função principal
 def main():
     print("Iniciando processo ETL...")
-    
+
     # Aguardar serviços
     wait_for_services()
     
@@ -649,32 +1051,26 @@ def main():
         # Verificar a existência dos arquivos CSV necessários
         check_files_exist()
         
-        # Conectar ao PostgreSQL
-        print("Conectando ao PostgreSQL...")
-        pg_conn = create_postgres_connection()
-        print("Conexão com PostgreSQL estabelecida com sucesso!")
-        
-        # Conectar ao MongoDB
-        print("Conectando ao MongoDB...")
-        mongo_client = create_mongo_connection()
-        print("Conexão com MongoDB estabelecida com sucesso!")
-        
-        # Criar tabelas do data warehouse
-        create_dw_tables(pg_conn)
+        # Conectar ao Data Warehouse
+        print(f"Conectando ao Data Warehouse ({DW_TARGET})...")
+        dw_target = create_dw_target()
+        print(f"Conexão com o Data Warehouse ({DW_TARGET}) estabelecida com sucesso!")
         
-        # Carregar dados nas dimensões
-        load_dimension_data(pg_conn)
+        # Conectar à fonte de avaliações
+        print(f"Conectando à fonte de avaliações ({REVIEWS_SOURCE})...")
+        mongo_client = create_reviews_source()
+        print(f"Fonte de avaliações ({REVIEWS_SOURCE}) disponível!")
         
-        # Carregar dados na tabela fato
-        load_fact_data(pg_conn, mongo_client)
+        # Criar tabelas, carregar dimensões e carregar a tabela fato
+        run_etl(dw_target, mongo_client)
         
         print("Processo ETL concluído com sucesso!")
     except Exception as e:
         print(f"Erro no processo ETL: {e}")
     finally:
         # Fechar conexões
-        if 'pg_conn' in locals() and pg_conn:
-            pg_conn.close()
+        if 'dw_target' in locals() and dw_target:
+            dw_target.close()
         if 'mongo_client' in locals() and mongo_client:
             mongo_client.close()
 
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# Permite importar o etl.py a partir do diretório de testes
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import etl
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+REJECTS_FIXTURES_DIR = os.path.join(FIXTURES_DIR, "rejeicoes")
+
+
+def use_input_dir(monkeypatch, input_dir):
+    monkeypatch.setattr(etl, "INPUT_DIR", input_dir)
+    monkeypatch.setattr(etl, "CUSTOMERS_FILE", os.path.join(input_dir, "olist_customers_dataset.csv"))
+    monkeypatch.setattr(etl, "ORDER_ITEMS_FILE", os.path.join(input_dir, "olist_order_items_dataset.csv"))
+    monkeypatch.setattr(etl, "ORDER_PAYMENTS_FILE", os.path.join(input_dir, "olist_order_payments_dataset.csv"))
+    monkeypatch.setattr(etl, "ORDERS_FILE", os.path.join(input_dir, "olist_orders_dataset.csv"))
+    monkeypatch.setattr(etl, "PRODUCTS_FILE", os.path.join(input_dir, "olist_products_dataset.csv"))
+    monkeypatch.setattr(etl, "REVIEWS_JSON_FILE", os.path.join(input_dir, "order_reviews.json"))
+    monkeypatch.setattr(etl, "REVIEWS_SOURCE", "json")
+    return input_dir
+
+
+# Aponta o ETL para o conjunto de dados de teste, com as avaliações em JSON
+@pytest.fixture
+def fixture_input(monkeypatch):
+    return use_input_dir(monkeypatch, FIXTURES_DIR)
+
+
+# Mesmo conjunto de dados acrescido de linhas inválidas em todas as fontes
+@pytest.fixture
+def rejects_input(monkeypatch):
+    return use_input_dir(monkeypatch, REJECTS_FIXTURES_DIR)
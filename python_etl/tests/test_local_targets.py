@@ -0,0 +1,149 @@
+import pytest
+
+import etl
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def target(request, fixture_input, monkeypatch):
+    if request.param == "duckdb":
+        pytest.importorskip("duckdb")
+    monkeypatch.setattr(etl, "DW_TARGET", request.param)
+    monkeypatch.setattr(etl, "DW_LOCAL_PATH", ":memory:")
+    target = etl.create_dw_target()
+    yield target
+    target.close()
+
+
+def count(target, table):
+    return target.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_run_etl_loads_dimensions_and_facts(target):
+    timings, _ = etl.run_etl(target, etl.create_reviews_source())
+
+    assert set(timings) == {
+        "create_dw_tables", "extract_sources", "validate_sources",
+        "load_dimension_data", "load_fact_data"
+    }
+    assert count(target, "dim_cliente") == 3
+    assert count(target, "dim_estado") == 2
+    assert count(target, "dim_produto") == 3
+    assert count(target, "dim_categoria_produto") == 2
+    assert count(target, "dim_tipo_pagamento") == 3
+    assert count(target, "fato_vendas") == 4
+    assert count(target, "dq_rejeicoes") == 0
+
+
+def test_run_etl_resolves_surrogate_keys(target):
+    etl.run_etl(target, etl.create_reviews_source())
+
+    rows = target.execute("""
+        SELECT f.order_id, c.cliente_key, p.produto_key, e.estado_sigla,
+               CAST(d.data_completa AS VARCHAR), CAST(h.hora_completa AS VARCHAR),
+               t.tipo_pagamento, f.review_score, f.valor_pago, f.numero_parcelas
+        FROM fato_vendas f
+        JOIN dim_cliente c ON c.cliente_id = f.cliente_id
+        JOIN dim_produto p ON p.produto_id = f.produto_id
+        JOIN dim_estado e ON e.estado_id = f.estado_id
+        JOIN dim_data d ON d.data_id = f.data_id
+        JOIN dim_hora h ON h.hora_id = f.hora_id
+        JOIN dim_tipo_pagamento t ON t.tipo_pagamento_id = f.tipo_pagamento_id
+        ORDER BY f.order_id, p.produto_key
+    """).fetchall()
+
+    assert [row[:7] for row in rows] == [
+        ("o1", "c1", "p1", "SP", "2017-10-02", "10:56:33", "credit_card"),
+        ("o2", "c2", "p2", "SP", "2018-07-24", "20:41:37", "boleto"),
+        ("o2", "c2", "p3", "SP", "2018-07-24", "20:41:37", "boleto"),
+        ("o3", "c3", "p1", "RJ", "2018-08-08", "08:38:49", "credit_card"),
+    ]
+    # Avaliações e pagamentos agregados por pedido
+    assert [row[7] for row in rows] == [4, 5, 5, None]
+    assert float(rows[0][8]) == pytest.approx(38.71)
+    assert [row[9] for row in rows] == [1, 1, 1, 3]
+
+
+def test_run_etl_twice_keeps_dimensions_unique(target):
+    etl.run_etl(target, etl.create_reviews_source())
+    datas = count(target, "dim_data")
+    horas = count(target, "dim_hora")
+    etl.run_etl(target, etl.create_reviews_source())
+
+    assert count(target, "dim_cliente") == 3
+    assert count(target, "dim_produto") == 3
+    assert count(target, "dim_data") == datas
+    assert count(target, "dim_hora") == horas
+    assert count(target, "fato_vendas") == 8
+
+
+def test_run_etl_quarantines_bad_rows(target, rejects_input):
+    _, quality_report = etl.run_etl(target, etl.create_reviews_source())
+
+    rejects = target.execute("""
+        SELECT fonte, linha, regras, execucao_id FROM dq_rejeicoes ORDER BY fonte, linha
+    """).fetchall()
+    assert [row[:3] for row in rejects] == [
+        ("customers", 3, "customer_state_conhecido"),
+        ("order_items", 4, "orders_pai_rejeitado"),
+        ("order_items", 5, "products_pai_rejeitado"),
+        ("order_items", 6, "price_nao_negativo"),
+        ("order_items", 7, "orders_pai_rejeitado"),
+        ("order_items", 8, "orders_pai_rejeitado"),
+        ("order_payments", 5, "orders_pai_rejeitado"),
+        ("order_payments", 6, "orders_pai_rejeitado"),
+        ("order_payments", 7, "orders_pai_rejeitado"),
+        ("order_payments", 8, "orders_pai_rejeitado"),
+        ("order_payments", 9, "payment_value_nao_negativo"),
+        ("order_reviews", 2, "review_score_entre_1_e_5"),
+        ("orders", 3, "customers_pai_rejeitado"),
+        ("orders", 4, "dependente_rejeitado"),
+        ("orders", 5, "dependente_rejeitado"),
+        ("orders", 6, "dependente_rejeitado"),
+        ("orders", 7, "dependente_rejeitado"),
+        ("products", 3, "product_name_lenght_inteiro_nao_negativo"),
+    ]
+    assert len({row[3] for row in rejects}) == 1
+    assert rejects[0][3] is not None
+    assert {m["regra"]: m["rejeitadas"] for m in quality_report if m["fonte"] == "orders"}["dependente_rejeitado"] == 4
+
+    # Apenas os pedidos íntegros chegam à fato, com valores numéricos agregados
+    assert count(target, "dim_cliente") == 3
+    assert count(target, "dim_produto") == 3
+    rows = target.execute("""
+        SELECT order_id, valor_pago, numero_parcelas, review_score
+        FROM fato_vendas ORDER BY order_id, produto_id
+    """).fetchall()
+    assert [row[0] for row in rows] == ["o1", "o2", "o2", "o3"]
+    assert [float(row[1]) for row in rows] == pytest.approx([38.71, 161.46, 161.46, 179.12])
+    assert [row[2] for row in rows] == [1, 1, 1, 10]
+    assert [row[3] for row in rows] == [4, 5, 5, None]
+
+
+def test_incomplete_target_fails_on_instantiation():
+    class IncompleteTarget(etl.DWTarget):
+        def identity_column(self, table):
+            return "INTEGER PRIMARY KEY"
+
+    with pytest.raises(TypeError):
+        IncompleteTarget(None)
+
+
+def test_reviews_fall_back_to_mongo_init_script(fixture_input, monkeypatch, tmp_path):
+    monkeypatch.setattr(etl, "REVIEWS_JSON_FILE", str(tmp_path / "ausente.json"))
+
+    reviews = etl.read_reviews_json()
+
+    assert len(reviews) == 10000
+    assert {"order_id", "review_score"} <= set(reviews[0])
+
+
+def test_check_files_exist_requires_reviews_file_for_local_sources(fixture_input, monkeypatch, tmp_path):
+    etl.check_files_exist()
+
+    monkeypatch.setattr(etl, "REVIEWS_JSON_FILE", str(tmp_path / "ausente.json"))
+    monkeypatch.setattr(etl, "MONGO_INIT_FILE", str(tmp_path / "init.js"))
+    with pytest.raises(FileNotFoundError):
+        etl.check_files_exist()
+
+    monkeypatch.setattr(etl, "REVIEWS_SOURCE", "mongo")
+    etl.check_files_exist()
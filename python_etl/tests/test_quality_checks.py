@@ -0,0 +1,197 @@
+import json
+
+import pandas as pd
+import pytest
+
+import etl
+
+
+def rule(fonte, regra):
+    return dict(etl.QUALITY_CHECKS[fonte])[regra]
+
+
+@pytest.mark.parametrize("fonte, regra, data, expected", [
+    ("customers", "customer_id_obrigatorio",
+     {"customer_id": ["c1", None]}, [True, False]),
+    ("customers", "customer_state_conhecido",
+     {"customer_state": ["SP", "ZZ", None]}, [True, False, False]),
+    ("products", "product_id_obrigatorio",
+     {"product_id": ["p1", None]}, [True, False]),
+    ("products", "product_name_lenght_inteiro_nao_negativo",
+     {"product_name_lenght": [40.0, None, "4x", 2.5, -1]}, [True, True, False, False, False]),
+    ("products", "product_description_lenght_inteiro_nao_negativo",
+     {"product_description_lenght": ["287", "x"]}, [True, False]),
+    ("products", "product_photos_qty_inteiro_nao_negativo",
+     {"product_photos_qty": [1, None, 1.5]}, [True, True, False]),
+    ("products", "product_width_cm_nao_negativo",
+     {"product_width_cm": [10.0, None, -1.0, "x"]}, [True, True, False, False]),
+    ("orders", "order_chaves_obrigatorias",
+     {"order_id": ["o1", None, "o3"], "customer_id": ["c1", "c2", None]}, [True, False, False]),
+    ("orders", "order_purchase_timestamp_valido",
+     {"order_purchase_timestamp": ["2017-10-02 10:56:33", None, "not a date"]}, [True, False, False]),
+    ("orders", "order_delivered_customer_date_valido",
+     {"order_delivered_customer_date": ["2017-10-10 21:25:13", None, "2017-13-45 99:00:00"]},
+     [True, True, False]),
+    ("order_items", "price_nao_negativo",
+     {"price": [0.0, 10.5, -3.0, None]}, [True, True, False, False]),
+    ("order_items", "freight_value_nao_negativo",
+     {"freight_value": [1.0, "abc"]}, [True, False]),
+    ("order_payments", "payment_value_nao_negativo",
+     {"payment_value": [18.12, -3.0]}, [True, False]),
+    ("order_payments", "payment_installments_inteiro_nao_negativo",
+     {"payment_installments": [0, 10, -1, 2.5, None]}, [True, True, False, False, False]),
+    ("order_reviews", "review_score_entre_1_e_5",
+     {"review_score": ["1", "5", "4.5", "9", "abc", None]}, [True, True, False, False, False, False]),
+])
+def test_rule(fonte, regra, data, expected):
+    df = pd.DataFrame(data)
+    assert rule(fonte, regra)(df).fillna(False).tolist() == expected
+
+
+def test_rule_with_missing_column_fails_every_row():
+    df = pd.DataFrame({"order_id": ["o1", "o2"]})
+    assert rule("order_reviews", "review_score_entre_1_e_5")(df).tolist() == [False, False]
+    assert rule("orders", "order_chaves_obrigatorias")(df).tolist() == [False, False]
+
+
+def test_validate_frame_preserves_order_of_valid_rows():
+    df = pd.DataFrame({
+        "order_id": ["o1", "o2", "o3", "o4", "o5"],
+        "product_id": ["p1", "p2", "p3", "p4", "p5"],
+        "price": [5.0, -1.0, 3.0, -2.0, 1.0],
+        "freight_value": [1.0, 1.0, 1.0, 1.0, 1.0],
+    })
+
+    valid, rejects, metrics = etl.validate_frame("order_items", df)
+
+    assert valid["order_id"].tolist() == ["o1", "o3", "o5"]
+    assert valid.index.tolist() == [0, 2, 4]
+    assert rejects["linha"].tolist() == [1, 3]
+    assert {m["regra"]: m["rejeitadas"] for m in metrics} == {
+        "order_item_chaves_obrigatorias": 0,
+        "price_nao_negativo": 2,
+        "freight_value_nao_negativo": 0,
+    }
+
+
+def test_validate_frame_rejects_contents():
+    df = pd.DataFrame({
+        "order_id": ["o1", None],
+        "product_id": ["p1", "p2"],
+        "price": [5.0, -1.0],
+        "freight_value": [1.0, "x"],
+    })
+
+    valid, rejects, _ = etl.validate_frame("order_items", df)
+
+    assert len(valid) == 1
+    assert rejects.columns.tolist() == ["fonte", "regras", "linha", "registro"]
+    row = rejects.iloc[0]
+    assert row["fonte"] == "order_items"
+    assert row["regras"] == "order_item_chaves_obrigatorias,price_nao_negativo,freight_value_nao_negativo"
+    assert row["linha"] == 1
+    assert json.loads(row["registro"]) == {
+        "order_id": None, "product_id": "p2", "price": -1.0, "freight_value": "x"
+    }
+
+
+def test_validate_frame_converts_valid_rows_to_declared_types():
+    df = pd.DataFrame({
+        "order_id": ["o1", "o1", "o2", "o3", "o3"],
+        "payment_value": ["18.12", "20.59", "abc", "100", "79.12"],
+        "payment_installments": ["1", "1", "1", "10", "9"],
+    })
+
+    valid, rejects, _ = etl.validate_frame("order_payments", df)
+
+    assert rejects["linha"].tolist() == [2]
+    assert valid["payment_value"].dtype == "float64"
+    assert str(valid["payment_installments"].dtype) == "Int64"
+    agg = valid.groupby("order_id").agg({"payment_value": "sum", "payment_installments": "max"})
+    assert agg.loc["o1", "payment_value"] == pytest.approx(38.71)
+    assert agg.loc["o3", "payment_installments"] == 10
+
+
+def test_validate_frame_converts_timestamps():
+    df = pd.DataFrame({
+        "order_id": ["o1", "o2"],
+        "customer_id": ["c1", "c2"],
+        "order_purchase_timestamp": ["2017-10-02 10:56:33", "not a date"],
+        "order_approved_at": [None, None],
+        "order_delivered_carrier_date": [None, None],
+        "order_delivered_customer_date": [None, None],
+        "order_estimated_delivery_date": ["2017-10-18 00:00:00", None],
+    })
+
+    valid, _, _ = etl.validate_frame("orders", df)
+
+    assert valid["order_id"].tolist() == ["o1"]
+    assert valid["order_purchase_timestamp"].iloc[0] == pd.Timestamp("2017-10-02 10:56:33")
+    assert pd.api.types.is_datetime64_any_dtype(valid["order_estimated_delivery_date"])
+
+
+def test_validate_frame_empty_source():
+    valid, rejects, metrics = etl.validate_frame("order_reviews", pd.DataFrame())
+
+    assert valid.empty
+    assert rejects.empty
+    assert all(m["rejeitadas"] == 0 for m in metrics)
+
+
+def test_propagate_rejections_excludes_whole_orders():
+    frames = {
+        "customers": pd.DataFrame({"customer_id": ["c1", "c2", "c3"], "customer_state": ["SP", "ZZ", "RJ"]}),
+        "products": pd.DataFrame({
+            "product_id": ["p1", "p2"],
+            "product_name_lenght": [40, None],
+            "product_description_lenght": [287, None],
+            "product_photos_qty": [1, None],
+            "product_weight_g": [100.0, 100.0],
+            "product_length_cm": [10.0, 10.0],
+            "product_height_cm": [10.0, 10.0],
+            "product_width_cm": [10.0, -1.0],
+        }),
+        "orders": pd.DataFrame({
+            "order_id": ["o1", "o2", "o3", "o4"],
+            "customer_id": ["c1", "c2", "c3", "c3"],
+            "order_purchase_timestamp": ["2017-10-02 10:56:33"] * 4,
+            "order_approved_at": [None] * 4,
+            "order_delivered_carrier_date": [None] * 4,
+            "order_delivered_customer_date": [None] * 4,
+            "order_estimated_delivery_date": [None] * 4,
+        }),
+        "order_items": pd.DataFrame({
+            "order_id": ["o1", "o2", "o3", "o4"],
+            "product_id": ["p1", "p1", "p2", "p1"],
+            "price": [1.0, 1.0, 1.0, 1.0],
+            "freight_value": [1.0, 1.0, 1.0, 1.0],
+        }),
+        "order_payments": pd.DataFrame({
+            "order_id": ["o1", "o1", "o4"],
+            "payment_value": [8.0, -3.0, 1.0],
+            "payment_installments": [1, 1, 1],
+        }),
+        "order_reviews": pd.DataFrame({"order_id": ["o1", "o4"], "review_score": ["5", "4"]}),
+    }
+    failures = {}
+    metrics = {}
+    for fonte, df in frames.items():
+        failures[fonte], metrics[fonte] = etl.check_frame(fonte, df)
+
+    etl.propagate_rejections(frames, failures, metrics)
+    valid = {fonte: etl.split_rejects(fonte, df, failures[fonte])[0] for fonte, df in frames.items()}
+
+    # o1: pagamento negativo; o2: cliente rejeitado; o3: produto rejeitado
+    assert valid["orders"]["order_id"].tolist() == ["o4"]
+    assert valid["order_items"]["order_id"].tolist() == ["o4"]
+    assert valid["order_payments"]["order_id"].tolist() == ["o4"]
+    assert valid["order_reviews"]["order_id"].tolist() == ["o4"]
+
+    _, order_rejects = etl.split_rejects("orders", frames["orders"], failures["orders"])
+    assert order_rejects["regras"].tolist() == [
+        "dependente_rejeitado", "customers_pai_rejeitado", "dependente_rejeitado"
+    ]
+    _, item_rejects = etl.split_rejects("order_items", frames["order_items"], failures["order_items"])
+    assert item_rejects["regras"].tolist() == [
+        "orders_pai_rejeitado", "orders_pai_rejeitado", "products_pai_rejeitado"
+    ]